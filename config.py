@@ -1,5 +1,27 @@
 # Optional for future configs (DB, logging, etc.)
+import os
+
 DEBUG = True
 HOST = '0.0.0.0'
 PORT = 8000
 
+# Request profiling (admin only). Profiling is disabled while no token is set.
+ADMIN_TOKEN = os.environ.get('SLR_ADMIN_TOKEN')
+PROFILE_DIR = os.environ.get('SLR_PROFILE_DIR', '/tmp/slr_profiles')
+FIXTURE_DIR = os.environ.get('SLR_FIXTURE_DIR', os.path.join(os.path.dirname(__file__), 'benchmarks', 'fixtures'))
+
+# /parse-string step cap; traced parses default to 1000 steps to bound the response size
+MAX_PARSE_STEPS = int(os.environ.get('SLR_MAX_PARSE_STEPS', 1000000))
+TRACE_MAX_STEPS = 1000
+
+# Interactive parser sessions (per-process: needs one worker or sticky routing by session id)
+SESSION_IDLE_TIMEOUT = int(os.environ.get('SLR_SESSION_IDLE_TIMEOUT', 600))
+MAX_SESSIONS = int(os.environ.get('SLR_MAX_SESSIONS', 1000))
+
+# Shared cache for compiled grammars and rendered artifacts: memory, disk or redis
+CACHE_BACKEND = os.environ.get('SLR_CACHE_BACKEND', 'memory')
+CACHE_URL = os.environ.get('SLR_CACHE_URL', 'redis://localhost:6379/0')
+CACHE_DIR = os.environ.get('SLR_CACHE_DIR', '/tmp/slr_cache')
+CACHE_TTL = int(os.environ.get('SLR_CACHE_TTL', 86400))
+# Size cap for the disk backend (diagrams are a few hundred KB each)
+CACHE_MAX_BYTES = int(os.environ.get('SLR_CACHE_MAX_BYTES', 512 * 1024 * 1024))
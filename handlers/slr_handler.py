@@ -1,6 +1,58 @@
 from flask import request, jsonify, send_file
+import io
+import json
 import traceback
 from services.slr_service import SLRParser
+from services.codegen import generate_parser_module
+from services.parser_sessions import SessionStore
+from services.grammar_cache import compiled_grammars
+from services.dfa_queries import (
+    format_state, format_transitions, page_states, state_detail, symbol_states, neighbourhood
+)
+from utils.encoding import json_response
+import config
+
+# Sessions live in this process only: run a single worker, or route /session/<id>/*
+# with sticky sessions (e.g. by session id), or steps hitting another worker get a 404.
+sessions = SessionStore(idle_timeout=config.SESSION_IDLE_TIMEOUT, max_sessions=config.MAX_SESSIONS)
+
+# Wire format version 2 is the sparse encoding; 1 is the legacy dense layout.
+LEGACY_FORMAT = 1
+SPARSE_FORMAT = 2
+
+
+def _sparse_dfa(parser, states, transitions):
+    symbols = sorted(parser.terminals - {'ε'}) + sorted(parser.non_terminals)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    productions = [[symbol_ids[lhs], [symbol_ids[x] for x in parser._split_production(rhs)]]
+                   for lhs, rhs in parser.productions]
+    states_sparse = [sorted([parser.production_ids[(lhs, rhs)], dot_pos] for lhs, rhs, dot_pos in state)
+                     for state in states]
+    transitions_sparse = [[from_state, symbol_ids[symbol], to_state]
+                          for (from_state, symbol), to_state in transitions.items()]
+    return {
+        'success': True,
+        'version': SPARSE_FORMAT,
+        'symbols': symbols,
+        'productions': productions,
+        'states': states_sparse,
+        'transitions': transitions_sparse,
+        'num_states': len(states)
+    }
+
+
+def _sparse_parsing_table(parser, parsing_table, action_columns, goto_columns):
+    action_ids = {symbol: i for i, symbol in enumerate(action_columns)}
+    goto_ids = {symbol: i for i, symbol in enumerate(goto_columns)}
+    action = [[state, action_ids[symbol], value]
+              for state, row in parsing_table['ACTION'].items()
+              for symbol, value in row.items() if symbol in action_ids]
+    goto = [[state, goto_ids[symbol], value]
+            for state, row in parsing_table['GOTO'].items()
+            for symbol, value in row.items() if symbol in goto_ids]
+    return {'num_states': len(parser.states), 'action_columns': action_columns,
+            'goto_columns': goto_columns, 'action': action, 'goto': goto}
+
 
 def handle_parse_grammar():
     try:
@@ -8,6 +60,9 @@ def handle_parse_grammar():
         grammar_text = data.get('grammar', '')
         parser = SLRParser()
         grammar = parser.parse_grammar(grammar_text)
+        if data.get('reduce'):
+            parser.reduce_grammar()
+            grammar = parser.grammar
         return jsonify({
             'success': True,
             'grammar': {k: v for k, v in grammar.items()},
@@ -23,6 +78,8 @@ def handle_augment_grammar():
         grammar_text = data.get('grammar', '')
         parser = SLRParser()
         parser.parse_grammar(grammar_text)
+        if data.get('reduce'):
+            parser.reduce_grammar()
         
         augmented_raw = parser.augment_grammar()
         
@@ -58,6 +115,8 @@ def handle_compute_first_follow():
         grammar_text = data.get('grammar', '')
         parser = SLRParser()
         parser.parse_grammar(grammar_text)
+        if data.get('reduce'):
+            parser.reduce_grammar()
         parser.augment_grammar()
         first_sets = parser.compute_first_sets()
         follow_sets = parser.compute_follow_sets()
@@ -79,36 +138,16 @@ def handle_compute_first_follow():
 def handle_build_dfa():
     try:
         data = request.json
-        grammar_text = data.get('grammar', '')
-        parser = SLRParser()
-        parser.parse_grammar(grammar_text)
-        parser.augment_grammar()
-        parser.compute_first_sets()
-        parser.compute_follow_sets()
-        states, transitions = parser.build_dfa()
-
-        states_formatted = []
-        for i, state in enumerate(states):
-            items = []
-            for lhs, rhs, dot_pos in state:
-                symbols = parser._split_production(rhs) if rhs else []
-                item_str = f"{lhs} -> "
-                for j in range(len(symbols)):
-                    if j == dot_pos:
-                        item_str += ". "
-                    item_str += symbols[j] + " "
-                if dot_pos == len(symbols):
-                    item_str += "."
-                items.append(item_str.strip())
-            states_formatted.append({'id': i, 'name': f'I{i}', 'items': items, 'is_start': i == 0})
-
-        transitions_formatted = [{'from': f'I{from_state}', 'to': f'I{to_state}', 'symbol': symbol}
-                                 for (from_state, symbol), to_state in transitions.items()]
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'))
+        states, transitions = parser.states, parser.dfa_transitions
 
-        return jsonify({
+        if data.get('version', LEGACY_FORMAT) == SPARSE_FORMAT:
+            return json_response(_sparse_dfa(parser, states, transitions))
+
+        return json_response({
             'success': True,
-            'states': states_formatted,
-            'transitions': transitions_formatted,
+            'states': [format_state(parser, i) for i in range(len(states))],
+            'transitions': format_transitions(transitions),
             'num_states': len(states)
         })
     except Exception as e:
@@ -124,16 +163,12 @@ def handle_generate_dfa_diagram():
             print("Error: No grammar provided")
             return jsonify({'success': False, 'error': 'No grammar provided'}), 400
 
-        parser = SLRParser()
-        parser.parse_grammar(grammar_text)
-        parser.augment_grammar()
-        parser.compute_first_sets()
-        parser.compute_follow_sets()
-        parser.build_dfa()
+        parser = compiled_grammars.get(grammar_text, reduce=data.get('reduce'))
 
         print(f"States: {len(parser.states)}, Transitions: {len(parser.dfa_transitions)}")
 
-        diagram_base64 = parser.generate_dfa_diagram()
+        diagram_base64 = compiled_grammars.artifact('reduced-diagram' if data.get('reduce') else 'diagram',
+                                                    grammar_text, parser.generate_dfa_diagram)
         print("DFA diagram generated successfully")
 
         return jsonify({'success': True, 'diagram': diagram_base64})
@@ -146,17 +181,30 @@ def handle_generate_dfa_diagram():
 def handle_build_parsing_table():
     try:
         data = request.json
-        grammar_text = data.get('grammar', '')
-        parser = SLRParser()
-        parser.parse_grammar(grammar_text)
-        parser.augment_grammar()
-        parser.compute_first_sets()
-        parser.compute_follow_sets()
-        parser.build_dfa()
-        parsing_table, conflicts = parser.build_parsing_table()
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'),
+                                       compress=data.get('compress'))
+        parsing_table, conflicts = parser.parsing_table, parser.conflicts
 
         all_terminals = sorted([t for t in parser.terminals if t != '$' and t != 'ε'])
         all_non_terminals = sorted([nt for nt in parser.non_terminals if nt != parser.start_symbol])
+        is_slr1 = len(conflicts) == 0
+        result = {
+            'success': True,
+            'conflicts': conflicts,
+            'has_conflicts': len(conflicts) > 0,
+            'is_slr1': is_slr1,
+            'message': 'Grammar is SLR(1)' if is_slr1 else f'Grammar is NOT SLR(1) - {len(conflicts)} conflicts found'
+        }
+        if data.get('compress'):
+            compressed = parser.compressed_table
+            result['compressed_table'] = compressed.to_dict()
+            result['compression'] = compressed.stats()
+
+        if data.get('version', LEGACY_FORMAT) == SPARSE_FORMAT:
+            result['version'] = SPARSE_FORMAT
+            result['parsing_table'] = _sparse_parsing_table(parser, parsing_table,
+                                                            all_terminals + ['$'], all_non_terminals)
+            return json_response(result)
 
         table_rows = []
         for state in range(len(parser.states)):
@@ -168,15 +216,8 @@ def handle_build_parsing_table():
                 row[non_terminal] = parsing_table['GOTO'].get(state, {}).get(non_terminal, '')
             table_rows.append(row)
 
-        is_slr1 = len(conflicts) == 0
-        return jsonify({
-            'success': True,
-            'parsing_table': {'rows': table_rows, 'action_columns': all_terminals + ['$'], 'goto_columns': all_non_terminals},
-            'conflicts': conflicts,
-            'has_conflicts': len(conflicts) > 0,
-            'is_slr1': is_slr1,
-            'message': 'Grammar is SLR(1)' if is_slr1 else f'Grammar is NOT SLR(1) - {len(conflicts)} conflicts found'
-        })
+        result['parsing_table'] = {'rows': table_rows, 'action_columns': all_terminals + ['$'], 'goto_columns': all_non_terminals}
+        return json_response(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -184,16 +225,14 @@ def handle_build_parsing_table():
 def handle_parse_string():
     try:
         data = request.json
-        grammar_text = data.get('grammar', '')
         input_string = data.get('input_string', '')
-        parser = SLRParser()
-        parser.parse_grammar(grammar_text)
-        parser.augment_grammar()
-        parser.compute_first_sets()
-        parser.compute_follow_sets()
-        parser.build_dfa()
-        parser.build_parsing_table()
-        result = parser.parse_string(input_string)
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'),
+                                       compress=data.get('compress'))
+        trace = bool(data.get('trace', True))
+        max_steps = data.get('max_steps', config.TRACE_MAX_STEPS if trace else None)
+        max_steps = config.MAX_PARSE_STEPS if max_steps is None else min(int(max_steps), config.MAX_PARSE_STEPS)
+        result = parser.parse_string(input_string, build_tree=bool(data.get('build_tree')), trace=trace,
+                                     max_steps=max_steps, recover=bool(data.get('recover')))
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
@@ -203,22 +242,28 @@ def handle_verify_grammar():
     try:
         data = request.json
         grammar_text = data.get('grammar', '')
-        parser = slrparser()
+        parser = SLRParser()
         parser.parse_grammar(grammar_text)
+        if data.get('reduce'):
+            useless = parser.reduce_grammar()
+        else:
+            useless = parser.find_useless_symbols()
         parser.augment_grammar()
         tokenized_productions = {lhs: [parser._split_production(rhs) if rhs else [] for rhs in rhs_list]
                                  for lhs, rhs_list in parser.grammar.items()}
         return jsonify({
-            'success': true,
+            'success': True,
             'grammar': grammar_text,
             'non_terminals': sorted(list(parser.non_terminals)),
             'terminals': sorted(list(parser.terminals - {'$'})),
             'tokenized_productions': tokenized_productions,
             'productions': [{'index': i, 'lhs': lhs, 'rhs': rhs if rhs else 'ε'}
-                            for i, (lhs, rhs) in enumerate(parser.productions)]
+                            for i, (lhs, rhs) in enumerate(parser.productions)],
+            'useless_symbols': useless,
+            'reduced': bool(data.get('reduce'))
         })
-    except exception as e:
-        return jsonify({'success': false, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
 def handle_generate_pdf_notes():
     try:
@@ -233,6 +278,8 @@ def handle_generate_pdf_notes():
        
         parser = SLRParser()
         parser.parse_grammar(grammar_text)
+        if data.get('reduce'):
+            parser.reduce_grammar()
         parser.augment_grammar()
         parser.compute_first_sets()
         parser.compute_follow_sets()
@@ -249,4 +296,162 @@ def handle_generate_pdf_notes():
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
+def handle_export_parser():
+    try:
+        data = request.get_json(force=True)
+        grammar_text = data.get('grammar', '')
+        if not grammar_text:
+            return jsonify({'success': False, 'error': 'No grammar provided'}), 400
+
+        parser = compiled_grammars.get(grammar_text, reduce=data.get('reduce'))
+        source = generate_parser_module(parser)
+        return send_file(
+            io.BytesIO(source.encode('utf-8')),
+            as_attachment=True,
+            download_name="slr_parser.py",
+            mimetype="text/x-python"
+        )
+    except Exception as e:
+        print("Exception in /api/export-parser:\n", traceback.format_exc())
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+# --------------------- Interactive Sessions ---------------------
+MAX_SESSION_STEPS = 10000
+
+
+def _run_session_command(session, op, count=1):
+    count = min(count, MAX_SESSION_STEPS)
+    with session.lock:
+        if op == 'step':
+            deltas = [session.step()]
+            while session.status == 'running' and len(deltas) < count:
+                deltas.append(session.step())
+            return {'success': True, 'deltas': deltas}
+        if op == 'step_back':
+            deltas = [session.step_back()]
+            while session.undo_log and len(deltas) < count:
+                deltas.append(session.step_back())
+            return {'success': True, 'deltas': deltas}
+        if op == 'run_to_reduce':
+            return {'success': True, 'deltas': session.run_to_reduce(MAX_SESSION_STEPS)}
+        if op == 'state':
+            return {'success': True, 'state': session.snapshot()}
+    raise ValueError(f"Unknown session operation: {op}")
+
+
+def handle_create_session():
+    try:
+        data = request.json
+        session_id, session = sessions.create(data.get('grammar', ''), data.get('input_string', ''), reduce=data.get('reduce'))
+        return jsonify({'success': True, 'session_id': session_id, 'state': session.snapshot()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+def handle_session_command(session_id, op):
+    try:
+        data = request.get_json(silent=True) or {}
+        return jsonify(_run_session_command(sessions.get(session_id), op.replace('-', '_'), int(data.get('count', 1))))
+    except KeyError as e:
+        return jsonify({'success': False, 'error': e.args[0]}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+def handle_delete_session(session_id):
+    if not sessions.delete(session_id):
+        return jsonify({'success': False, 'error': f'Unknown or expired session: {session_id}'}), 404
+    return jsonify({'success': True})
+
+
+def handle_session_ws(ws):
+    """WebSocket transport: {"op": "create", "grammar", "input_string"} then {"op": "step", "count"} ...
+
+    Only the session this socket created is deleted when it closes; sessions
+    addressed by id (e.g. created over HTTP) are left alone.
+    """
+    owned_id = None
+    session_id = None
+    try:
+        while True:
+            # A client disconnect raises ConnectionClosed from receive/send rather than returning None
+            message = ws.receive()
+            if message is None:
+                break
+            try:
+                data = json.loads(message)
+                op = data.get('op')
+                if op == 'create':
+                    if owned_id:
+                        sessions.delete(owned_id)
+                    session_id, session = sessions.create(data.get('grammar', ''), data.get('input_string', ''), reduce=data.get('reduce'))
+                    owned_id = session_id
+                    result = {'success': True, 'session_id': session_id, 'state': session.snapshot()}
+                elif op == 'close':
+                    break
+                else:
+                    session_id = data.get('session_id', session_id)
+                    result = _run_session_command(sessions.get(session_id), op, int(data.get('count', 1)))
+            except KeyError as e:
+                result = {'success': False, 'error': e.args[0]}
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            ws.send(json.dumps(result))
+    finally:
+        if owned_id:
+            sessions.delete(owned_id)
+
+
+# --------------------- Automaton Queries ---------------------
+MAX_PAGE_SIZE = 500
+
+
+def handle_dfa_states():
+    try:
+        data = request.json
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'))
+        page = max(1, int(data.get('page', 1)))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(data.get('page_size', 50))))
+        return json_response({'success': True, **page_states(parser, page, page_size)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 
+def handle_dfa_state():
+    try:
+        data = request.json
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'))
+        return json_response({'success': True, **state_detail(parser, int(data.get('state', 0)))})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+def handle_dfa_neighbourhood():
+    try:
+        data = request.json
+        parser = compiled_grammars.get(data.get('grammar', ''), reduce=data.get('reduce'))
+        k = max(0, int(data.get('k', 1)))
+        if data.get('symbol') is not None:
+            seeds = symbol_states(parser, data['symbol'])
+            if not seeds:
+                raise ValueError(f"No transitions on symbol '{data['symbol']}'")
+        else:
+            seed = int(data.get('state', 0))
+            if not 0 <= seed < len(parser.states):
+                raise ValueError(f"No such state: I{seed}")
+            seeds = [seed]
+
+        state_ids, transitions = neighbourhood(parser, seeds, k)
+        result = {
+            'success': True,
+            'seeds': seeds,
+            'states': [format_state(parser, i) for i in state_ids],
+            'transitions': format_transitions(transitions),
+            'num_states': len(parser.states)
+        }
+        if data.get('render'):
+            result['diagram'] = parser.generate_dfa_diagram(state_ids=state_ids, transitions=transitions, root=seeds[0])
+        return json_response(result)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
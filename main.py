@@ -1,12 +1,21 @@
 from flask import Flask
 from flask_cors import CORS
 from routes.slr_routes import slr_bp
+from handlers.slr_handler import handle_session_ws
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket sessions are optional; the HTTP session API still works
+    Sock = None
 
 app = Flask(__name__)
 CORS(app)
 
 app.register_blueprint(slr_bp, url_prefix='/api')
 
+if Sock is not None:
+    Sock(app).route('/api/session/ws')(handle_session_ws)
+
 @app.route('/')
 def root():
     return {'info': "SLR Parser"}
@@ -8,18 +8,33 @@ from handlers.slr_handler import (
     handle_generate_dfa_diagram,
     handle_build_parsing_table,
     handle_parse_string,
-    handle_verify_grammar
+    handle_verify_grammar,
+    handle_export_parser,
+    handle_create_session,
+    handle_session_command,
+    handle_delete_session,
+    handle_dfa_states,
+    handle_dfa_state,
+    handle_dfa_neighbourhood
 )
+from utils.profiling import profiled
 
 slr_bp = Blueprint('slr', __name__)
 
-slr_bp.route('/parse-grammar', methods=['POST'])(handle_parse_grammar)
-slr_bp.route('/augment-grammar', methods=['POST'])(handle_augment_grammar)
-slr_bp.route('/compute-first-follow', methods=['POST'])(handle_compute_first_follow)
-slr_bp.route('/build-dfa', methods=['POST'])(handle_build_dfa)
-slr_bp.route('/generate-dfa-diagram', methods=['POST'])(handle_generate_dfa_diagram)
-slr_bp.route('/build-parsing-table', methods=['POST'])(handle_build_parsing_table)
-slr_bp.route('/parse-string', methods=['POST'])(handle_parse_string)
-slr_bp.route('/verify-grammar', methods=['POST'])(handle_verify_grammar)
-slr_bp.route('/export-pdf',methods=["POST"])(handle_generate_pdf_notes)
+slr_bp.route('/parse-grammar', methods=['POST'])(profiled(handle_parse_grammar))
+slr_bp.route('/augment-grammar', methods=['POST'])(profiled(handle_augment_grammar))
+slr_bp.route('/compute-first-follow', methods=['POST'])(profiled(handle_compute_first_follow))
+slr_bp.route('/build-dfa', methods=['POST'])(profiled(handle_build_dfa))
+slr_bp.route('/generate-dfa-diagram', methods=['POST'])(profiled(handle_generate_dfa_diagram))
+slr_bp.route('/build-parsing-table', methods=['POST'])(profiled(handle_build_parsing_table))
+slr_bp.route('/parse-string', methods=['POST'])(profiled(handle_parse_string))
+slr_bp.route('/verify-grammar', methods=['POST'])(profiled(handle_verify_grammar))
+slr_bp.route('/export-pdf',methods=["POST"])(profiled(handle_generate_pdf_notes))
+slr_bp.route('/export-parser', methods=['POST'])(profiled(handle_export_parser))
 
+slr_bp.route('/session', methods=['POST'])(handle_create_session)
+slr_bp.route('/session/<session_id>/<any("step", "step-back", "run-to-reduce", "state"):op>', methods=['POST'])(handle_session_command)
+slr_bp.route('/session/<session_id>', methods=['DELETE'])(handle_delete_session)
+slr_bp.route('/dfa/states', methods=['POST'])(profiled(handle_dfa_states))
+slr_bp.route('/dfa/state', methods=['POST'])(profiled(handle_dfa_state))
+slr_bp.route('/dfa/neighbourhood', methods=['POST'])(profiled(handle_dfa_neighbourhood))
@@ -0,0 +1,259 @@
+# cache.py
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+# Bump when the serialised parser or artifact layout changes, so old entries are never read back
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_key(kind, text):
+    return f"slr:v{CACHE_FORMAT_VERSION}:{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store shared by the compiled grammar and artifact caches."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the stored bytes, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store bytes under key."""
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCache(CacheBackend):
+    """One file per key in a local directory; shared by every worker on the node.
+
+    Expired entries are deleted when read. With max_bytes set, every write of
+    a tenth of max_bytes triggers prune(), which drops expired entries and then
+    the oldest ones until the directory fits again.
+    """
+
+    def __init__(self, directory, ttl=None, max_bytes=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._written = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Another worker got there first
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        if self.max_bytes:
+            with self._lock:
+                self._written += len(value)
+                due = self._written * 10 >= self.max_bytes
+                if due:
+                    self._written = 0
+            if due:
+                self.prune()
+
+    def prune(self):
+        """Delete expired entries, then the oldest ones until the directory fits in max_bytes."""
+        now = time.time()
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if self.ttl and now - stat.st_mtime > self.ttl:
+                    self._remove(entry.path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+        return total
+
+
+class RedisCache(CacheBackend):
+    """Minimal RESP client (GET/SET EX), so any Redis-protocol server works without extra packages."""
+
+    def __init__(self, url, ttl=None, timeout=2.0, retry_after=30.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._command('AUTH', self.password)
+        if self.db:
+            self._command('SELECT', str(self.db))
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._reader = None
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RuntimeError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply from cache server: {line!r}")
+
+    def _command(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _call(self, *args):
+        with self._lock:
+            # After a failure, fail fast for retry_after seconds instead of waiting on the connect timeout
+            if time.monotonic() < self._down_until:
+                raise ConnectionError("Cache server unavailable, retrying later")
+            # One reconnect attempt covers servers that dropped an idle connection
+            reused = self._sock is not None
+            for attempt in range(2 if reused else 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._command(*args)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt or not reused:
+                        self._down_until = time.monotonic() + self.retry_after
+                        raise
+
+    def get(self, key):
+        return self._call('GET', key)
+
+    def set(self, key, value):
+        if self.ttl:
+            self._call('SET', key, value, 'EX', self.ttl)
+        else:
+            self._call('SET', key, value)
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one computation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+
+
+def create_cache_backend(kind, url=None, directory=None, ttl=None, max_bytes=None):
+    if kind == 'memory':
+        return MemoryCache()
+    if kind == 'disk':
+        return DiskCache(directory, ttl=ttl, max_bytes=max_bytes)
+    if kind == 'redis':
+        return RedisCache(url, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {kind}")
@@ -0,0 +1,150 @@
+# codegen.py
+import argparse
+import sys
+
+from services.slr_service import compile_grammar
+from services.table_compression import CompressedTable
+
+# Generated modules encode ACTION entries as ints: 0 = error, n > 0 = shift to
+# state n - 1, n < 0 = reduce by production -n - 1. Reducing by production 0
+# (the augmented start rule) means accept.
+_MODULE_TEMPLATE = '''\
+"""SLR(1) parser generated from the grammar in PRODUCTIONS. Standalone, no dependencies."""
+
+TERMINALS = {terminals!r}
+NON_TERMINALS = {non_terminals!r}
+# (lhs, rhs symbols) per production; production 0 is the augmented start rule
+PRODUCTIONS = {productions!r}
+
+ACTION_DEFAULT = {action_default!r}
+ACTION_BASE = {action_base!r}
+ACTION_CHECK = {action_check!r}
+ACTION_NEXT = {action_next!r}
+GOTO_BASE = {goto_base!r}
+GOTO_NEXT = {goto_next!r}
+PROD_LHS = {prod_lhs!r}
+PROD_LEN = {prod_len!r}
+# Tokens with an explicit ACTION per state, before default reductions were folded in
+EXPECTED = {expected!r}
+
+_TERMINAL_IDS = {{t: i for i, t in enumerate(TERMINALS)}}
+
+
+class ParseError(SyntaxError):
+    def __init__(self, position, token, expected):
+        super().__init__(f"Unexpected {{token!r}} at token {{position}}, expected one of {{expected}}")
+        self.position = position
+        self.token = token
+        self.expected = expected
+
+
+def expected_tokens(state):
+    return list(EXPECTED[state])
+
+
+def parse(tokens):
+    """Return True if the token sequence is accepted, raise ParseError otherwise."""
+    terminal_ids = _TERMINAL_IDS
+    action_default = ACTION_DEFAULT
+    action_base = ACTION_BASE
+    action_check = ACTION_CHECK
+    action_next = ACTION_NEXT
+    goto_base = GOTO_BASE
+    goto_next = GOTO_NEXT
+    prod_lhs = PROD_LHS
+    prod_len = PROD_LEN
+    n_action = len(action_check)
+    # State that first saw the current token, before any default reduction;
+    # errors report its expected set rather than the state that detected them.
+    seen_by = -1
+
+    tokens = list(tokens)
+    tokens.append('$')
+    stack = [0]
+    state = 0
+    pos = 0
+    col = terminal_ids.get(tokens[0], -1)
+    while True:
+        if col < 0:
+            raise ParseError(pos, tokens[pos], expected_tokens(state))
+        i = action_base[state] + col
+        if i < n_action and action_check[i] == state:
+            act = action_next[i]
+        else:
+            act = action_default[state]
+            if seen_by < 0 and tokens[pos] not in EXPECTED[state]:
+                seen_by = state
+        if act > 0:
+            state = act - 1
+            stack.append(state)
+            pos += 1
+            col = terminal_ids.get(tokens[pos], -1)
+            seen_by = -1
+        elif act < 0:
+            prod = -act - 1
+            if prod == 0:
+                return True
+            n = prod_len[prod]
+            if n:
+                del stack[-n:]
+            state = goto_next[goto_base[stack[-1]] + prod_lhs[prod]]
+            stack.append(state)
+        else:
+            raise ParseError(pos, tokens[pos], expected_tokens(state if seen_by < 0 else seen_by))
+'''
+
+
+def _encode_action(action):
+    if not action or action == 'error':
+        return 0
+    if action == 'acc':
+        return -1
+    if action.startswith('s'):
+        return int(action[1:]) + 1
+    return -(int(action[1:]) + 1)
+
+
+def generate_parser_module(parser):
+    """Emit the source of a standalone Python module for a compiled SLRParser."""
+    if parser.conflicts:
+        raise ValueError(f"Grammar is not SLR(1): {len(parser.conflicts)} conflicts found")
+    # Build the packed table locally so shared (cached) parsers are left untouched
+    table = parser.compressed_table or CompressedTable.from_parsing_table(parser.parsing_table, *parser.table_columns())
+    goto_ids = {symbol: i for i, symbol in enumerate(table.goto_columns)}
+
+    productions = tuple((lhs, tuple(parser._split_production(rhs) if rhs else ()))
+                        for lhs, rhs in parser.productions)
+    return _MODULE_TEMPLATE.format(
+        terminals=tuple(table.action_columns),
+        non_terminals=tuple(table.goto_columns),
+        productions=productions,
+        action_default=tuple(_encode_action(a) for a in table.action_default),
+        action_base=tuple(table.action_base),
+        action_check=tuple(table.action_check),
+        action_next=tuple(_encode_action(a) for a in table.action_next),
+        goto_base=tuple(table.goto_base),
+        goto_next=tuple(-1 if g is None else g for g in table.goto_next),
+        # The augmented start symbol has no GOTO column; production 0 accepts before using it.
+        prod_lhs=tuple(goto_ids.get(lhs, -1) for lhs, _ in productions),
+        prod_len=tuple(len(rhs) for _, rhs in productions),
+        expected=tuple(tuple(parser.expected_tokens(state)) for state in range(len(table.action_base)))
+    )
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Generate a standalone SLR(1) parser module.")
+    arg_parser.add_argument('grammar', help="grammar file, one 'A -> α | β' rule per line")
+    arg_parser.add_argument('-o', '--output', help="output .py file (default: stdout)")
+    args = arg_parser.parse_args(argv)
+
+    with open(args.grammar, encoding='utf-8') as f:
+        source = generate_parser_module(compile_grammar(f.read()))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(source)
+    else:
+        sys.stdout.write(source)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# dfa_queries.py
+from collections import deque
+
+
+def format_state(parser, state_idx):
+    items = []
+    for lhs, rhs, dot_pos in parser.states[state_idx]:
+        dotted = list(parser._split_production(rhs) if rhs else [])
+        dotted.insert(dot_pos, '.')
+        items.append(f"{lhs} -> {' '.join(dotted)}")
+    return {'id': state_idx, 'name': f'I{state_idx}', 'items': items, 'is_start': state_idx == 0}
+
+
+def format_transitions(transitions):
+    return [{'from': f'I{from_state}', 'to': f'I{to_state}', 'symbol': symbol}
+            for (from_state, symbol), to_state in transitions.items()]
+
+
+def page_states(parser, page, page_size):
+    num_states = len(parser.states)
+    start = (page - 1) * page_size
+    return {
+        'states': [format_state(parser, i) for i in range(start, min(start + page_size, num_states))],
+        'page': page,
+        'page_size': page_size,
+        'num_states': num_states,
+        'num_pages': (num_states + page_size - 1) // page_size
+    }
+
+
+def state_detail(parser, state_idx):
+    if not 0 <= state_idx < len(parser.states):
+        raise ValueError(f"No such state: I{state_idx}")
+    adjacency = parser.dfa_adjacency()
+    outgoing = {(state_idx, symbol): to_state for symbol, to_state in adjacency['out'][state_idx]}
+    incoming = {(from_state, symbol): state_idx for symbol, from_state in adjacency['in'][state_idx]}
+    return {
+        'state': format_state(parser, state_idx),
+        'outgoing': format_transitions(outgoing),
+        'incoming': format_transitions(incoming)
+    }
+
+
+def symbol_states(parser, symbol):
+    """States with a transition on symbol, in either direction."""
+    seeds = set()
+    for (from_state, sym), to_state in parser.dfa_transitions.items():
+        if sym == symbol:
+            seeds.add(from_state)
+            seeds.add(to_state)
+    return sorted(seeds)
+
+
+def neighbourhood(parser, seeds, k):
+    """States within k hops of any seed (edges followed both ways) and the transitions among them."""
+    adjacency = parser.dfa_adjacency()
+    distance = {s: 0 for s in seeds}
+    queue = deque(seeds)
+    while queue:
+        state_idx = queue.popleft()
+        if distance[state_idx] == k:
+            continue
+        for _, other in adjacency['out'][state_idx] + adjacency['in'][state_idx]:
+            if other not in distance:
+                distance[other] = distance[state_idx] + 1
+                queue.append(other)
+    transitions = {(from_state, symbol): to_state
+                   for from_state in distance
+                   for symbol, to_state in adjacency['out'][from_state]
+                   if to_state in distance}
+    return sorted(distance), transitions
@@ -0,0 +1,88 @@
+# grammar_cache.py
+import json
+import threading
+import traceback
+from collections import OrderedDict
+
+import config
+from services.cache import SingleFlight, cache_key, create_cache_backend
+from services.slr_service import SLRParser, compile_grammar
+from utils.encoding import dumps
+
+
+class CompiledGrammarCache:
+    """Compiled parsers keyed by grammar text, backed by a shared byte cache.
+
+    A small in-process LRU of parser objects sits in front of the backend, so a
+    hot grammar is neither recompiled nor deserialised. Cached parsers are
+    shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, backend, max_entries=64):
+        self.backend = backend
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def _backend_get(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception:
+            # A missing shared cache only costs recomputation
+            print("Cache read failed:\n", traceback.format_exc())
+            return None
+
+    def _backend_set(self, key, value):
+        try:
+            self.backend.set(key, value)
+        except Exception:
+            print("Cache write failed:\n", traceback.format_exc())
+
+    def _load(self, grammar_text, reduce, compress):
+        kind = ('reduced-' if reduce else '') + ('compressed-' if compress else '') + 'grammar'
+        key = cache_key(kind, grammar_text)
+        data = self._backend_get(key)
+        if data is not None:
+            return SLRParser.from_dict(json.loads(data))
+        parser = compile_grammar(grammar_text, reduce=reduce)
+        if compress:
+            parser.compress_parsing_table()
+        self._backend_set(key, dumps(parser.to_dict()))
+        return parser
+
+    def get(self, grammar_text, reduce=False, compress=False):
+        """Compiled parser for the grammar; compress=True returns a separate entry whose
+        lookups go through the compressed table, so shared parsers are never switched."""
+        key = (grammar_text.strip(), bool(reduce), bool(compress))
+        with self._lock:
+            parser = self._entries.get(key)
+            if parser is not None:
+                self._entries.move_to_end(key)
+                return parser
+        parser = self._flights.do(key, lambda: self._load(*key))
+        with self._lock:
+            self._entries[key] = parser
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parser
+
+    def artifact(self, kind, grammar_text, build):
+        """Return a cached str artifact (e.g. a rendered diagram), building it once if missing."""
+        key = cache_key(kind, grammar_text.strip())
+
+        def load():
+            data = self._backend_get(key)
+            if data is not None:
+                return data.decode('utf-8')
+            value = build()
+            self._backend_set(key, value.encode('utf-8'))
+            return value
+        return self._flights.do(key, load)
+
+
+compiled_grammars = CompiledGrammarCache(create_cache_backend(
+    config.CACHE_BACKEND, url=config.CACHE_URL, directory=config.CACHE_DIR, ttl=config.CACHE_TTL,
+    max_bytes=config.CACHE_MAX_BYTES
+))
@@ -0,0 +1,61 @@
+# parse_tree.py
+
+
+class ParseTree:
+    """Concrete syntax tree kept in flat parallel arrays, indexed by node id.
+
+    Leaves have production -1 and position set to the token index; interior
+    nodes list their children in children[child_start:child_start + child_count].
+    """
+
+    def __init__(self):
+        self.symbol_ids = {}
+        self.symbols = []
+        self.symbol = []
+        self.production = []
+        self.position = []
+        self.child_start = []
+        self.child_count = []
+        self.children = []
+
+    def _intern(self, symbol):
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def _add(self, symbol, production, position, children):
+        node = len(self.symbol)
+        self.symbol.append(self._intern(symbol))
+        self.production.append(production)
+        self.position.append(position)
+        self.child_start.append(len(self.children))
+        self.child_count.append(len(children))
+        self.children.extend(children)
+        return node
+
+    def add_leaf(self, token, position):
+        return self._add(token, -1, position, ())
+
+    def add_node(self, lhs, production, children):
+        return self._add(lhs, production, -1, children)
+
+    def __len__(self):
+        return len(self.symbol)
+
+    def node_children(self, node):
+        start = self.child_start[node]
+        return self.children[start:start + self.child_count[node]]
+
+    def to_json(self, root):
+        return {
+            'root': root,
+            'symbols': self.symbols,
+            'symbol': self.symbol,
+            'production': self.production,
+            'position': self.position,
+            'child_start': self.child_start,
+            'child_count': self.child_count,
+            'children': self.children
+        }
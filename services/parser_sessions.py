@@ -0,0 +1,159 @@
+# parser_sessions.py
+import threading
+import time
+import uuid
+
+from services.grammar_cache import compiled_grammars
+
+
+class ParseSession:
+    """A persistent parse over one compiled parser, stepped forward and back.
+
+    Every step appends an undo record instead of snapshotting the stack, and
+    reports only what changed, so stepping costs the same at any depth.
+    """
+
+    def __init__(self, parser, input_string):
+        self.parser = parser
+        self.tokens = input_string.split() + ['$']
+        self.stack = [0]
+        self.input_ptr = 0
+        self.status = 'running'
+        self.undo_log = []
+        self.rhs_lengths = [len(parser._split_production(rhs)) if rhs else 0 for _, rhs in parser.productions]
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _delta(self, action, popped=0, pushed=()):
+        return {
+            'step': len(self.undo_log),
+            'action': action,
+            'status': self.status,
+            'popped': popped,
+            'pushed': list(pushed),
+            'input_ptr': self.input_ptr,
+            'depth': len(self.stack) // 2
+        }
+
+    def step(self):
+        if self.status != 'running':
+            return self._delta('DONE')
+        current_state = self.stack[-1]
+        current_token = self.tokens[self.input_ptr]
+        action = self.parser._action(current_state, current_token)
+
+        if action == 'error':
+            self.undo_log.append(('status', self.status))
+            self.status = 'error'
+            delta = self._delta('ERROR')
+            delta['expected'] = self.parser.expected_tokens(current_state)
+            return delta
+
+        if action == 'acc':
+            self.undo_log.append(('status', self.status))
+            self.status = 'accepted'
+            return self._delta('ACCEPT')
+
+        if action.startswith('s'):
+            next_state = int(action[1:])
+            self.stack.append(current_token)
+            self.stack.append(next_state)
+            self.input_ptr += 1
+            self.undo_log.append(('shift',))
+            return self._delta(f'Shift to I{next_state}', pushed=(current_token, next_state))
+
+        prod_num = int(action[1:])
+        lhs, rhs = self.parser.productions[prod_num]
+        n = self.rhs_lengths[prod_num] * 2
+        popped = self.stack[len(self.stack) - n:]
+        del self.stack[len(self.stack) - n:]
+        goto_state = self.parser._goto(self.stack[-1], lhs)
+        if goto_state is None:
+            self.stack.extend(popped)
+            self.undo_log.append(('status', self.status))
+            self.status = 'error'
+            return self._delta('GOTO error')
+        self.stack.append(lhs)
+        self.stack.append(goto_state)
+        self.undo_log.append(('reduce', popped))
+        return self._delta(f'Reduce by {lhs} -> {rhs if rhs else "ε"}', popped=n // 2, pushed=(lhs, goto_state))
+
+    def step_back(self):
+        if not self.undo_log:
+            return self._delta('START')
+        record = self.undo_log.pop()
+        if record[0] == 'status':
+            self.status = record[1]
+            return self._delta('UNDO')
+        if record[0] == 'shift':
+            del self.stack[-2:]
+            self.input_ptr -= 1
+            return self._delta('UNDO shift', popped=1)
+        del self.stack[-2:]
+        self.stack.extend(record[1])
+        return self._delta('UNDO reduce', popped=1, pushed=record[1])
+
+    def run_to_reduce(self, max_steps=10000):
+        deltas = []
+        while self.status == 'running' and len(deltas) < max_steps:
+            delta = self.step()
+            deltas.append(delta)
+            if delta['action'].startswith('Reduce'):
+                break
+        return deltas
+
+    def snapshot(self):
+        return {
+            'status': self.status,
+            'step': len(self.undo_log),
+            'stack': self.stack,
+            'input_ptr': self.input_ptr,
+            'input': self.tokens[self.input_ptr:]
+        }
+
+
+class SessionStore:
+    """Thread-safe registry of parse sessions with idle-timeout eviction.
+
+    Sessions are held in process memory, so every request for a session must
+    reach the worker that created it (a single worker or sticky routing).
+    """
+
+    def __init__(self, idle_timeout=600, max_sessions=1000):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _evict_idle(self, now):
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_used > self.idle_timeout]
+        for sid in expired:
+            del self._sessions[sid]
+
+    def create(self, grammar_text, input_string, reduce=False):
+        parser = compiled_grammars.get(grammar_text, reduce=reduce)
+        if parser.conflicts:
+            raise ValueError(f"Cannot parse: Grammar has conflicts (not SLR(1)). Conflicts: {len(parser.conflicts)} found.")
+        session = ParseSession(parser, input_string)
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions, key=lambda sid: self._sessions[sid].last_used)
+                del self._sessions[oldest]
+            self._sessions[session_id] = session
+        return session_id, session
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Unknown or expired session: {session_id}")
+            session.last_used = now
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
@@ -1,7 +1,9 @@
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 import matplotlib
 
 from utils.pdf import generate_pdf
+from services.table_compression import CompressedTable
+from services.parse_tree import ParseTree
 
 matplotlib.use('Agg')
 from utils.diagram_utils import generate_dfa_diagram_image  
@@ -18,8 +20,13 @@ class SLRParser:
         self.follow_sets = {}
         self.states = []
         self.dfa_transitions = {}
+        self._adjacency = None
+        self._recovery_points = None
         self.parsing_table = {'ACTION': {}, 'GOTO': {}}
+        self.compressed_table = None
         self.productions = []
+        self.production_ids = {}
+        self.semantic_actions = {}
         self.conflicts = []
 
     def parse_grammar(self, grammar_text):
@@ -72,6 +79,75 @@ class SLRParser:
             if term in str(self.grammar):
                 self.terminals.add(term)
 
+    # --------------------- Grammar Reduction ---------------------
+    def find_useless_symbols(self):
+        """Non-generating and unreachable nonterminals, in time linear in the grammar size."""
+        rules = [(lhs, self._split_production(rhs)) for lhs, rhs_list in self.grammar.items() for rhs in rhs_list]
+
+        # Generating: count the not-yet-generating nonterminals left in each rule body
+        pending = []
+        uses = {}
+        generating = set()
+        worklist = []
+        for i, (lhs, symbols) in enumerate(rules):
+            body_nts = [x for x in symbols if x in self.non_terminals]
+            pending.append(len(body_nts))
+            for symbol in body_nts:
+                uses.setdefault(symbol, []).append(i)
+            if not body_nts and lhs not in generating:
+                generating.add(lhs)
+                worklist.append(lhs)
+        while worklist:
+            symbol = worklist.pop()
+            for i in uses.get(symbol, []):
+                pending[i] -= 1
+                lhs = rules[i][0]
+                if pending[i] == 0 and lhs not in generating:
+                    generating.add(lhs)
+                    worklist.append(lhs)
+
+        # Reachable: only through rules whose bodies are fully generating
+        useful_rules = {}
+        for i, (lhs, symbols) in enumerate(rules):
+            if lhs in generating and pending[i] == 0:
+                useful_rules.setdefault(lhs, []).append(symbols)
+        reachable = set()
+        if self.original_start in generating:
+            reachable.add(self.original_start)
+            worklist = [self.original_start]
+            while worklist:
+                for symbols in useful_rules.get(worklist.pop(), []):
+                    for symbol in symbols:
+                        if symbol in self.non_terminals and symbol not in reachable:
+                            reachable.add(symbol)
+                            worklist.append(symbol)
+
+        removed = [{'lhs': lhs, 'rhs': rhs if rhs else 'ε'}
+                   for lhs, rhs_list in self.grammar.items() for rhs in rhs_list
+                   if lhs not in reachable or any(x in self.non_terminals and x not in generating
+                                                  for x in self._split_production(rhs))]
+        return {
+            'non_generating': sorted(self.non_terminals - generating),
+            'unreachable': sorted((self.non_terminals & generating) - reachable),
+            'removed_productions': removed
+        }
+
+    def reduce_grammar(self):
+        """Drop useless symbols and productions; call right after parse_grammar."""
+        report = self.find_useless_symbols()
+        if self.original_start in report['non_generating']:
+            raise ValueError(f"Start symbol {self.original_start} derives no terminal string")
+        removed = {(p['lhs'], p['rhs']) for p in report['removed_productions']}
+        reduced = OrderedDict()
+        for lhs, rhs_list in self.grammar.items():
+            kept = [rhs for rhs in rhs_list if (lhs, rhs if rhs else 'ε') not in removed]
+            if kept:
+                reduced[lhs] = kept
+        self.grammar = reduced
+        self.non_terminals = set(self.grammar.keys())
+        self._identify_symbols()
+        return report
+
     def _split_production(self, prod):
         if not prod or prod == 'ε':
             return []
@@ -107,6 +183,9 @@ class SLRParser:
         for lhs, rhs_list in self.grammar.items():
             for rhs in rhs_list:
                 self.productions.append((lhs, rhs))
+        self.production_ids = {}
+        for i, production in enumerate(self.productions):
+            self.production_ids.setdefault(production, i)
         return self.augmented_grammar
 
     def compute_first_sets(self):
@@ -231,6 +310,7 @@ class SLRParser:
         I0 = self.closure([initial_item])
         self.states = [I0]
         self.dfa_transitions = {}
+        self._adjacency = None
         queue = [I0]
         while queue:
             current_state = queue.pop(0)
@@ -241,7 +321,7 @@ class SLRParser:
                 symbols = [] if not rhs or rhs == 'ε' else self._split_production(rhs)
                 if dot_pos < len(symbols):
                     symbols_after_dot.add(symbols[dot_pos])
-            for symbol in symbols_after_dot:
+            for symbol in sorted(symbols_after_dot):
                 goto_state = self.goto(current_state, symbol)
                 if goto_state and len(goto_state) > 0:
                     if goto_state not in self.states:
@@ -251,9 +331,21 @@ class SLRParser:
                     self.dfa_transitions[(current_idx, symbol)] = goto_idx
         return self.states, self.dfa_transitions
 
+    def dfa_adjacency(self):
+        """Per-state (symbol, state) lists of outgoing and incoming transitions."""
+        if self._adjacency is None:
+            adjacency = {'out': [[] for _ in self.states], 'in': [[] for _ in self.states]}
+            for (from_state, symbol), to_state in self.dfa_transitions.items():
+                adjacency['out'][from_state].append((symbol, to_state))
+                adjacency['in'][to_state].append((symbol, from_state))
+            self._adjacency = adjacency
+        return self._adjacency
+
     # --------------------- Parsing Table ---------------------
     def build_parsing_table(self):
         self.parsing_table = {'ACTION': {}, 'GOTO': {}}
+        self.compressed_table = None
+        self._recovery_points = None
         self.conflicts = []
         for i in range(len(self.states)):
             self.parsing_table['ACTION'][i] = {}
@@ -273,7 +365,7 @@ class SLRParser:
                 lhs, rhs, dot_pos = item
                 symbols = [] if not rhs else self._split_production(rhs)
                 if dot_pos == len(symbols):
-                    prod_num = next((i for i, (l, r) in enumerate(self.productions) if l == lhs and r == rhs), None)
+                    prod_num = self.production_ids.get((lhs, rhs))
                     if prod_num is None:
                         continue
                     if lhs == self.start_symbol and rhs == self.original_start:
@@ -294,13 +386,98 @@ class SLRParser:
                 self.parsing_table['GOTO'][state_idx][symbol] = next_state_idx
         return self.parsing_table, self.conflicts
 
-    def parse_string(self, input_string):
+    def table_columns(self):
+        action_columns = sorted(t for t in self.terminals if t != '$' and t != 'ε') + ['$']
+        goto_columns = sorted(nt for nt in self.non_terminals if nt != self.start_symbol)
+        return action_columns, goto_columns
+
+    def compress_parsing_table(self):
+        """Switch lookups to the compressed table (default reductions + row displacement)."""
+        self.compressed_table = CompressedTable.from_parsing_table(self.parsing_table, *self.table_columns())
+        return self.compressed_table
+
+    def _action(self, state, token, dense=False):
+        if self.compressed_table is not None and not dense:
+            return self.compressed_table.action(state, token)
+        return self.parsing_table['ACTION'].get(state, {}).get(token, 'error')
+
+    def _goto(self, state, non_terminal, dense=False):
+        if self.compressed_table is not None and not dense:
+            return self.compressed_table.goto(state, non_terminal)
+        return self.parsing_table['GOTO'].get(state, {}).get(non_terminal)
+
+    def register_action(self, production, action):
+        """Attach a semantic action to a production (index or 'lhs -> rhs').
+
+        The action is called with the values of the right-hand side symbols and
+        its result becomes the value of the reduced nonterminal. Tokens evaluate
+        to their own text; productions without an action pass up their first
+        child's value.
+        """
+        if isinstance(production, str):
+            lhs, rhs = [part.strip() for part in production.replace('→', '->').split('->', 1)]
+            # Compare symbol sequences, so 'E -> E+T' finds the production written 'E + T'
+            symbols = self._split_production(rhs)
+            production = next((i for i, (p_lhs, p_rhs) in enumerate(self.productions)
+                               if p_lhs == lhs and self._split_production(p_rhs) == symbols), None)
+            if production is None:
+                raise ValueError(f"Unknown production: {lhs} -> {rhs}")
+        self.semantic_actions[production] = action
+
+    def expected_tokens(self, state):
+        return sorted(self.parsing_table['ACTION'].get(state, {}))
+
+    def recovery_points(self):
+        """Per-token sync sets for panic mode: {state: A} for states that can resume on the
+        token after a GOTO on A (token in FOLLOW(A)), and the states that act on it directly."""
+        if self._recovery_points is None:
+            resume, act = {}, {}
+            for state, row in self.parsing_table['ACTION'].items():
+                for token in row:
+                    act.setdefault(token, set()).add(state)
+            for state, gotos in self.parsing_table['GOTO'].items():
+                for non_terminal, goto_state in sorted(gotos.items()):
+                    for token in self.parsing_table['ACTION'].get(goto_state, {}):
+                        if token in self.follow_sets.get(non_terminal, ()):
+                            resume.setdefault(token, {}).setdefault(state, non_terminal)
+            self._recovery_points = resume, act
+        return self._recovery_points
+
+    def _find_recovery(self, stack, tokens, start, min_depth=0, on_stack=None):
+        """Panic mode: find the nearest input token some stacked state can resume on,
+        either after a GOTO on A (token in FOLLOW(A)) or, once the offending token
+        has been skipped, by acting on the token directly. min_depth applies to the
+        offending token only.
+
+        on_stack counts the states on the stack, so a token no stacked state can
+        resume on is rejected without walking the stack, and a walk that finds a
+        match is paid for by the states it pops: an error costs the tokens it skips.
+        Returns (states to pop, A or None, input position)."""
+        resume, act = self.recovery_points()
+        for ptr in range(start, len(tokens)):
+            token = tokens[ptr]
+            skipped = ptr > start
+            resume_states = resume.get(token, {})
+            act_states = act.get(token, ()) if skipped else ()
+            if on_stack is not None and not (any(on_stack[state] for state in resume_states)
+                                             or any(on_stack[state] for state in act_states)):
+                continue
+            for depth in range(0 if skipped else min_depth, len(stack) // 2 + 1):
+                state = stack[-1 - 2 * depth]
+                if state in resume_states:
+                    return depth, resume_states[state], ptr
+                if state in act_states:
+                    return depth, None, ptr
+        return None
+
+    def parse_string(self, input_string, build_tree=False, trace=True, max_steps=1000, recover=False):
         """Parse input string using SLR parsing table"""
         # If there are conflicts, we cannot parse with SLR(1)
         if self.conflicts:
             return {
                 'success': False, 
                 'steps': [], 
+                'errors': [],
                 'message': f'Cannot parse: Grammar has conflicts (not SLR(1)). Conflicts: {len(self.conflicts)} found.'
             }
         
@@ -310,83 +487,222 @@ class SLRParser:
         
         steps = []
         step_num = 1
+
+        # Tree nodes and semantic values live on stacks parallel to the symbols
+        tree = ParseTree() if build_tree else None
+        node_stack = []
+        evaluate = bool(self.semantic_actions)
+        value_stack = []
+        errors = []
+        resume_height = 0
+        # Default reductions delay error detection and would change where
+        # recovery resumes, so recovery always runs on the dense table.
+        compressed = None if recover else self.compressed_table
+        # State that first saw the current token before a default reduction the
+        # dense table would not have made; its ACTION row holds the true expected set.
+        expect_state = None
+        # Stacked-state counts, only needed to keep recovery linear
+        on_stack = Counter(stack[0::2]) if recover else None
+
+        def record(action_text):
+            if trace:
+                steps.append({
+                    'step': step_num,
+                    'stack': ' '.join([str(x) for x in stack]),
+                    'input': ' '.join(tokens[input_ptr:]),
+                    'action': action_text
+                })
         
         while True:
             current_state = stack[-1]
             current_token = tokens[input_ptr]
             
-            action = self.parsing_table['ACTION'].get(current_state, {}).get(current_token, 'error')
-            
-            stack_str = ' '.join([str(x) for x in stack])
-            input_str = ' '.join(tokens[input_ptr:])
+            action = self._action(current_state, current_token, dense=recover)
+            if (expect_state is None and compressed is not None and action.startswith('r')
+                    and compressed.is_default(current_state, current_token)
+                    and current_token not in self.parsing_table['ACTION'].get(current_state, {})):
+                expect_state = current_state
             
             if action == 'error':
-                steps.append({
-                    'step': step_num,
-                    'stack': stack_str,
-                    'input': input_str,
-                    'action': 'ERROR'
-                })
-                return {'success': False, 'steps': steps, 'message': 'String not accepted'}
+                record('ERROR')
+                # A second error on the same token means the last sync point did not help
+                repeated = bool(errors) and errors[-1]['position'] == input_ptr
+                if not repeated:
+                    errors.append({
+                        'position': input_ptr,
+                        'token': current_token,
+                        'expected': self.expected_tokens(current_state if expect_state is None else expect_state)
+                    })
+                if not recover:
+                    return {'success': False, 'steps': steps, 'errors': errors, 'message': 'String not accepted'}
+
+                # Retry below the state the last recovery resumed in, then give up on the offending token
+                min_depth = max(0, len(stack) // 2 + 1 - resume_height) if repeated else 0
+                recovery = self._find_recovery(stack, tokens, input_ptr, min_depth, on_stack)
+                if recovery is None:
+                    return {'success': False, 'steps': steps, 'errors': errors,
+                            'message': f'String not accepted - {len(errors)} syntax errors, could not recover'}
+                depth, non_terminal, input_ptr = recovery
+                for _ in range(depth):
+                    on_stack[stack[-1]] -= 1
+                    del stack[-2:]
+                    if tree is not None:
+                        node_stack.pop()
+                    if evaluate:
+                        value_stack.pop()
+                resume_height = len(stack) // 2
+                step_num += 1
+                if non_terminal is None:
+                    record(f'Recover: resume at token {input_ptr} in I{stack[-1]}')
+                else:
+                    goto_state = self._goto(stack[-1], non_terminal, dense=True)
+                    if tree is not None:
+                        node_stack.append(tree.add_node(non_terminal, -1, ()))
+                    if evaluate:
+                        value_stack.append(None)
+                    stack.append(non_terminal)
+                    stack.append(goto_state)
+                    on_stack[goto_state] += 1
+                    record(f'Recover: resume at token {input_ptr} with {non_terminal}, goto I{goto_state}')
             
-            if action == 'acc':
-                steps.append({
-                    'step': step_num,
-                    'stack': stack_str,
-                    'input': input_str,
-                    'action': 'ACCEPT'
-                })
-                return {'success': True, 'steps': steps, 'message': 'String accepted'}
+            elif action == 'acc':
+                record('ACCEPT')
+                if errors:
+                    return {'success': False, 'steps': steps, 'errors': errors,
+                            'message': f'String not accepted - {len(errors)} syntax errors'}
+                result = {'success': True, 'steps': steps, 'message': 'String accepted'}
+                if tree is not None:
+                    result['tree'] = tree.to_json(node_stack[-1])
+                if evaluate:
+                    result['value'] = value_stack[-1]
+                return result
             
-            if action.startswith('s'):
+            elif action.startswith('s'):
                 next_state = int(action[1:])
-                steps.append({
-                    'step': step_num,
-                    'stack': stack_str,
-                    'input': input_str,
-                    'action': f'Shift to I{next_state}'
-                })
+                record(f'Shift to I{next_state}')
                 
+                if tree is not None:
+                    node_stack.append(tree.add_leaf(current_token, input_ptr))
+                if evaluate:
+                    value_stack.append(current_token)
                 stack.append(current_token)
                 stack.append(next_state)
+                if on_stack is not None:
+                    on_stack[next_state] += 1
                 input_ptr += 1
+                expect_state = None
             
             elif action.startswith('r'):
                 prod_num = int(action[1:])
                 lhs, rhs = self.productions[prod_num]
-                
-                steps.append({
-                    'step': step_num,
-                    'stack': stack_str,
-                    'input': input_str,
-                    'action': f'Reduce by {lhs} -> {rhs if rhs else "ε"}'
-                })
+                record(f'Reduce by {lhs} -> {rhs if rhs else "ε"}')
                 
                 if not rhs:
                     rhs_symbols = []
                 else:
                     rhs_symbols = self._split_production(rhs)
-                
-                for _ in range(len(rhs_symbols) * 2):
+
+                n = len(rhs_symbols)
+                if on_stack is not None:
+                    on_stack.subtract(stack[len(stack) - 2 * n + 1::2])
+                for _ in range(n * 2):
                     stack.pop()
+
+                if tree is not None:
+                    children = node_stack[len(node_stack) - n:]
+                    del node_stack[len(node_stack) - n:]
+                    node_stack.append(tree.add_node(lhs, prod_num, children))
+                if evaluate:
+                    args = value_stack[len(value_stack) - n:]
+                    del value_stack[len(value_stack) - n:]
+                    semantic_action = self.semantic_actions.get(prod_num)
+                    if semantic_action is not None:
+                        value_stack.append(semantic_action(*args))
+                    else:
+                        value_stack.append(args[0] if args else None)
                 
                 state_after_pop = stack[-1]
-                goto_state = self.parsing_table['GOTO'].get(state_after_pop, {}).get(lhs)
+                goto_state = self._goto(state_after_pop, lhs, dense=recover)
                 
                 if goto_state is None:
-                    return {'success': False, 'steps': steps, 'message': 'GOTO error'}
+                    return {'success': False, 'steps': steps, 'errors': errors, 'message': 'GOTO error'}
                 
                 stack.append(lhs)
                 stack.append(goto_state)
+                if on_stack is not None:
+                    on_stack[goto_state] += 1
             
             step_num += 1
             
-            if step_num > 1000:
-                return {'success': False, 'steps': steps, 'message': 'Max steps exceeded'}
+            if max_steps is not None and step_num > max_steps:
+                return {'success': False, 'steps': steps, 'errors': errors, 'message': 'Max steps exceeded'}
+
 
+    # --------------------- Serialization ---------------------
+    def to_dict(self):
+        """Compiled-table format: everything needed to rebuild the parser without recomputing it."""
+        return {
+            'grammar': list(self.grammar.items()),
+            'original_start': self.original_start,
+            'start_symbol': self.start_symbol,
+            'terminals': sorted(self.terminals),
+            'non_terminals': sorted(self.non_terminals),
+            'productions': self.productions,
+            'first_sets': {k: sorted(v) for k, v in self.first_sets.items()},
+            'follow_sets': {k: sorted(v) for k, v in self.follow_sets.items()},
+            'states': [sorted(state) for state in self.states],
+            'transitions': [[from_state, symbol, to_state]
+                            for (from_state, symbol), to_state in self.dfa_transitions.items()],
+            'action': [[state, row] for state, row in self.parsing_table['ACTION'].items()],
+            'goto': [[state, row] for state, row in self.parsing_table['GOTO'].items()],
+            'conflicts': self.conflicts,
+            'compressed_table': self.compressed_table.to_dict() if self.compressed_table else None
+        }
 
-    def generate_dfa_diagram(self):
-        return generate_dfa_diagram_image(self.states, self.dfa_transitions, self._split_production)
+    @classmethod
+    def from_dict(cls, data):
+        parser = cls()
+        parser.grammar = OrderedDict((lhs, list(rhs_list)) for lhs, rhs_list in data['grammar'])
+        parser.original_start = data['original_start']
+        parser.start_symbol = data['start_symbol']
+        parser.terminals = set(data['terminals'])
+        parser.non_terminals = set(data['non_terminals'])
+        parser.augmented_grammar = OrderedDict()
+        parser.augmented_grammar[parser.start_symbol] = [parser.original_start]
+        parser.augmented_grammar.update(parser.grammar)
+        parser.productions = [tuple(p) for p in data['productions']]
+        for i, production in enumerate(parser.productions):
+            parser.production_ids.setdefault(production, i)
+        parser.first_sets = {k: set(v) for k, v in data['first_sets'].items()}
+        parser.follow_sets = {k: set(v) for k, v in data['follow_sets'].items()}
+        parser.states = [frozenset(tuple(item) for item in state) for state in data['states']]
+        parser.dfa_transitions = {(from_state, symbol): to_state for from_state, symbol, to_state in data['transitions']}
+        parser.parsing_table = {'ACTION': {state: row for state, row in data['action']},
+                                'GOTO': {state: row for state, row in data['goto']}}
+        parser.conflicts = list(data['conflicts'])
+        if data.get('compressed_table'):
+            parser.compressed_table = CompressedTable.from_dict(data['compressed_table'])
+        return parser
+
+    def generate_dfa_diagram(self, state_ids=None, transitions=None, root=0):
+        if transitions is None:
+            transitions = self.dfa_transitions
+        return generate_dfa_diagram_image(self.states, transitions, self._split_production,
+                                          state_ids=state_ids, root=root)
 
     def gen_pdf(self): 
-        return generate_pdf(self.grammar,self.start_symbol,self.first_sets, self.follow_sets) 
+        return generate_pdf(self.grammar,self.start_symbol,self.first_sets, self.follow_sets)
+
+
+def compile_grammar(grammar_text, reduce=False):
+    """Run the full pipeline (grammar -> FIRST/FOLLOW -> DFA -> table) and return the parser."""
+    parser = SLRParser()
+    parser.parse_grammar(grammar_text)
+    if reduce:
+        parser.reduce_grammar()
+    parser.augment_grammar()
+    parser.compute_first_sets()
+    parser.compute_follow_sets()
+    parser.build_dfa()
+    parser.build_parsing_table()
+    return parser
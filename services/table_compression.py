@@ -0,0 +1,128 @@
+# table_compression.py
+from collections import Counter
+
+EMPTY = -1
+
+
+def _pack_rows(rows):
+    """Row-displacement (comb vector) packing.
+
+    rows maps state -> {column: value}. Returns (base, check, values) where the
+    entry for (state, column) lives at base[state] + column iff check at that
+    slot equals state.
+    """
+    base = {}
+    check = []
+    values = []
+    # Dense rows first: they are the hardest to fit, sparse ones fill the gaps.
+    for state in sorted(rows, key=lambda s: len(rows[s]), reverse=True):
+        columns = rows[state]
+        if not columns:
+            base[state] = 0
+            continue
+        offset = 0
+        while any(offset + col < len(check) and check[offset + col] != EMPTY for col in columns):
+            offset += 1
+        needed = offset + max(columns) + 1
+        if needed > len(check):
+            check.extend([EMPTY] * (needed - len(check)))
+            values.extend([None] * (needed - len(values)))
+        for col, value in columns.items():
+            check[offset + col] = state
+            values[offset + col] = value
+        base[state] = offset
+    num_states = max(rows) + 1 if rows else 0
+    return [base.get(s, 0) for s in range(num_states)], check, values
+
+
+class CompressedTable:
+    """ACTION/GOTO table with default reductions and row-displacement packing."""
+
+    def __init__(self, action_columns, goto_columns, action_default,
+                 action_base, action_check, action_next,
+                 goto_base, goto_check, goto_next):
+        self.action_columns = list(action_columns)
+        self.goto_columns = list(goto_columns)
+        self.action_ids = {symbol: i for i, symbol in enumerate(self.action_columns)}
+        self.goto_ids = {symbol: i for i, symbol in enumerate(self.goto_columns)}
+        self.action_default = action_default
+        self.action_base = action_base
+        self.action_check = action_check
+        self.action_next = action_next
+        self.goto_base = goto_base
+        self.goto_check = goto_check
+        self.goto_next = goto_next
+
+    @classmethod
+    def from_parsing_table(cls, parsing_table, action_columns, goto_columns):
+        action_ids = {symbol: i for i, symbol in enumerate(action_columns)}
+        goto_ids = {symbol: i for i, symbol in enumerate(goto_columns)}
+
+        action_default = []
+        action_rows = {}
+        for state in sorted(parsing_table['ACTION']):
+            row = parsing_table['ACTION'][state]
+            reduces = Counter(a for a in row.values() if a.startswith('r'))
+            default = reduces.most_common(1)[0][0] if reduces else None
+            action_default.append(default)
+            action_rows[state] = {action_ids[symbol]: action for symbol, action in row.items()
+                                  if action != default and symbol in action_ids}
+
+        goto_rows = {state: {goto_ids[symbol]: target for symbol, target in row.items() if symbol in goto_ids}
+                     for state, row in parsing_table['GOTO'].items()}
+
+        action_base, action_check, action_next = _pack_rows(action_rows)
+        goto_base, goto_check, goto_next = _pack_rows(goto_rows)
+        return cls(action_columns, goto_columns, action_default,
+                   action_base, action_check, action_next,
+                   goto_base, goto_check, goto_next)
+
+    def action(self, state, terminal):
+        col = self.action_ids.get(terminal)
+        if col is None or state >= len(self.action_base):
+            return 'error'
+        idx = self.action_base[state] + col
+        if idx < len(self.action_check) and self.action_check[idx] == state:
+            return self.action_next[idx]
+        return self.action_default[state] or 'error'
+
+    def is_default(self, state, terminal):
+        """True when action() would answer with the row's default reduction."""
+        col = self.action_ids.get(terminal)
+        if col is None or state >= len(self.action_base) or self.action_default[state] is None:
+            return False
+        idx = self.action_base[state] + col
+        return not (idx < len(self.action_check) and self.action_check[idx] == state)
+
+    def goto(self, state, non_terminal):
+        col = self.goto_ids.get(non_terminal)
+        if col is None or state >= len(self.goto_base):
+            return None
+        idx = self.goto_base[state] + col
+        if idx < len(self.goto_check) and self.goto_check[idx] == state:
+            return self.goto_next[idx]
+        return None
+
+    def stats(self):
+        dense = len(self.action_default) * (len(self.action_columns) + len(self.goto_columns))
+        packed = sum(len(array) for array in (self.action_default, self.action_base, self.action_check,
+                                              self.action_next, self.goto_base, self.goto_check, self.goto_next))
+        return {'dense_cells': dense, 'packed_cells': packed}
+
+    # --------------------- Export Format ---------------------
+    def to_dict(self):
+        return {
+            'action_columns': self.action_columns,
+            'goto_columns': self.goto_columns,
+            'action_default': self.action_default,
+            'action_base': self.action_base,
+            'action_check': self.action_check,
+            'action_next': self.action_next,
+            'goto_base': self.goto_base,
+            'goto_check': self.goto_check,
+            'goto_next': self.goto_next
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
@@ -0,0 +1,184 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import services.grammar_cache as grammar_cache
+from services.cache import CacheBackend, DiskCache, RedisCache, cache_key
+from services.grammar_cache import CompiledGrammarCache
+
+GRAMMAR = "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id"
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisCache: GET and SET [EX seconds]."""
+
+    def handle(self):
+        self.server.connections.append(self.connection)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RespHandler)
+        self.store = {}
+        self.connections = []
+        self.now = 0.0
+
+    def execute(self, args):
+        command = args[0].upper()
+        if command == b'GET':
+            value, expires_at = self.store.get(args[1], (None, None))
+            if value is None or (expires_at is not None and self.now >= expires_at):
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == b'SET':
+            expires_at = None
+            if len(args) == 5 and args[3].upper() == b'EX':
+                expires_at = self.now + int(args[4])
+            self.store[args[1]] = (args[2], expires_at)
+            return b'+OK\r\n'
+        return b'-ERR unknown command\r\n'
+
+    def drop_connections(self):
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # Already closed by the client
+        self.connections.clear()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+
+@pytest.fixture
+def server():
+    srv = RespServer()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.drop_connections()
+    srv.server_close()
+
+
+def test_get_set_with_expiry(server):
+    cache = RedisCache(server.url, ttl=60)
+    assert cache.get('missing') is None
+    cache.set('key', b'\x00value\r\n')
+    assert cache.get('key') == b'\x00value\r\n'
+    server.now += 61
+    assert cache.get('key') is None
+
+
+def test_reconnects_after_server_drops_connection(server):
+    cache = RedisCache(server.url)
+    cache.set('key', b'value')
+    server.drop_connections()
+    assert cache.get('key') == b'value'
+
+
+def test_concurrent_gets_compile_once(server, monkeypatch):
+    compiles = []
+    compile_grammar = grammar_cache.compile_grammar
+
+    def slow_compile(grammar_text, reduce=False):
+        compiles.append(grammar_text)
+        time.sleep(0.2)
+        return compile_grammar(grammar_text, reduce=reduce)
+
+    monkeypatch.setattr(grammar_cache, 'compile_grammar', slow_compile)
+    compiled = CompiledGrammarCache(RedisCache(server.url))
+    with ThreadPoolExecutor(8) as pool:
+        parsers = list(pool.map(lambda _: compiled.get(GRAMMAR), range(8)))
+    assert len(compiles) == 1
+    assert all(parser is parsers[0] for parser in parsers)
+    assert cache_key('grammar', GRAMMAR).encode() in server.store
+
+    # A second process sharing the server deserialises instead of compiling
+    other = CompiledGrammarCache(RedisCache(server.url)).get(GRAMMAR)
+    assert len(compiles) == 1
+    assert other.parsing_table == parsers[0].parsing_table
+
+
+def test_unreachable_server_fails_fast():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    cache = RedisCache(f"redis://127.0.0.1:{port}/0", retry_after=60)
+    connects = []
+    connect = cache._connect
+    cache._connect = lambda: (connects.append(1), connect())
+
+    with pytest.raises(OSError):
+        cache.get('key')
+    with pytest.raises(ConnectionError):
+        cache.get('key')
+    assert len(connects) == 1
+
+    cache._down_until = 0.0
+    with pytest.raises(OSError):
+        cache.set('key', b'value')
+    assert len(connects) == 2
+
+
+def test_endpoints_compile_each_grammar_once(monkeypatch):
+    from main import app
+
+    compiles = []
+    compile_grammar = grammar_cache.compile_grammar
+
+    def counting_compile(grammar_text, reduce=False):
+        compiles.append(grammar_text)
+        return compile_grammar(grammar_text, reduce=reduce)
+
+    monkeypatch.setattr(grammar_cache, 'compile_grammar', counting_compile)
+    grammar = "S -> a S b | c d"
+    client = app.test_client()
+    for path, extra in [('/build-dfa', {}), ('/build-parsing-table', {}), ('/parse-string', {'input_string': 'a c d b'}),
+                        ('/export-parser', {}), ('/build-dfa', {'version': 2})]:
+        assert client.post('/api' + path, json={'grammar': grammar, **extra}).status_code == 200
+    assert len(compiles) == 1
+
+    # Compression gets its own entry instead of switching the shared parser's lookups
+    response = client.post('/api/parse-string', json={'grammar': grammar, 'input_string': 'a c b', 'compress': True})
+    assert response.get_json()['errors'][0]['position'] == 2
+    assert len(compiles) == 2
+    assert grammar_cache.compiled_grammars.get(grammar).compressed_table is None
+
+
+def test_disk_cache_drops_expired_and_oldest_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=60, max_bytes=1000)
+    for i in range(12):
+        cache.set(f'key{i}', b'x' * 100)
+        path = cache._path(f'key{i}')
+        os.utime(path, (time.time() - 30 + i, time.time() - 30 + i))
+    # The oldest entries went first once the directory passed max_bytes
+    assert cache.prune() <= 1000
+    assert cache.get('key0') is None
+    assert cache.get('key11') == b'x' * 100
+
+    os.utime(cache._path('key11'), (0, 0))
+    assert cache.get('key11') is None
+    assert not os.path.exists(cache._path('key11'))
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
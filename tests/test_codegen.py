@@ -0,0 +1,49 @@
+import pytest
+
+from services.codegen import generate_parser_module
+from services.slr_service import compile_grammar
+
+EXPR_GRAMMAR = """E -> E + T | T
+T -> T * F | F
+F -> ( E ) | id"""
+
+
+def _load(source):
+    namespace = {}
+    exec(compile(source, '<generated>', 'exec'), namespace)
+    return namespace
+
+
+@pytest.mark.parametrize('grammar', [
+    r'S -> a \x b',
+    'S -> a """ b',
+    "S -> a ''' b",
+    'S -> { a } | {}',
+    r'S -> \N{x} \\ \u',
+])
+def test_generated_module_compiles_for_hostile_grammars(grammar):
+    parser = compile_grammar(grammar)
+    module = _load(generate_parser_module(parser))
+    lhs, rhs = parser.productions[1]
+    assert module['parse'](parser._split_production(rhs))
+
+
+def test_generated_parser_matches_interpreter():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    module = _load(generate_parser_module(parser))
+    for text in ['id + id * id', '( id + id ) * id', 'id + * id', 'id id', '( id', '', 'id foo', 'id (',
+                 'id * ( id + id ) )', '( ( id * id']:
+        result = parser.parse_string(text)
+        try:
+            assert module['parse'](text.split()), text
+            error = None
+        except module['ParseError'] as e:
+            error = {'position': e.position, 'token': e.token, 'expected': e.expected}
+        assert (error is None) == result['success'], text
+        if error is not None:
+            assert error == result['errors'][0], text
+
+
+def test_conflicting_grammar_is_rejected():
+    with pytest.raises(ValueError):
+        generate_parser_module(compile_grammar('S -> S S | a'))
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+
+from services.slr_service import compile_grammar
+
+GRAMMARS = [
+    "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id",
+    "S -> a S b | c",
+    "S -> A B\nA -> a A | a\nB -> b B | b",
+]
+RENDERS = 24
+THREADS = 8
+
+
+def test_concurrent_renders_match_serial_renders():
+    parsers = [compile_grammar(g) for g in GRAMMARS]
+    serial = [p.generate_dfa_diagram() for p in parsers]
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        images = list(pool.map(lambda i: parsers[i % len(parsers)].generate_dfa_diagram(), range(RENDERS)))
+
+    for i, image in enumerate(images):
+        assert image == serial[i % len(parsers)]
+    assert plt.get_fignums() == []
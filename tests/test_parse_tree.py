@@ -0,0 +1,79 @@
+import pytest
+
+from services.slr_service import compile_grammar
+
+EXPR_GRAMMAR = """E -> E + T | T
+T -> T * F | F
+F -> ( E ) | id"""
+
+
+def _nested(tree, node):
+    """Rebuild (symbol, children...) tuples from the flat arrays."""
+    symbol = tree['symbols'][tree['symbol'][node]]
+    start, count = tree['child_start'][node], tree['child_count'][node]
+    if tree['production'][node] == -1:
+        return symbol, tree['position'][node]
+    return (symbol, *[_nested(tree, child) for child in tree['children'][start:start + count]])
+
+
+def test_tree_arrays():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    tree = parser.parse_string('id + id', build_tree=True)['tree']
+
+    assert _nested(tree, tree['root']) == (
+        'E', ('E', ('T', ('F', ('id', 0)))), ('+', 1), ('T', ('F', ('id', 2)))
+    )
+    # Nodes are appended as they are shifted or reduced, so the root comes last
+    assert tree['root'] == len(tree['symbol']) - 1
+    assert len(tree['symbols']) == len(set(tree['symbols']))
+    assert all(p == -1 for p, pos in zip(tree['production'], tree['position']) if pos >= 0)
+
+
+def test_semantic_actions_run_bottom_up_left_to_right():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    values = iter([2, 3, 4])
+    order = []
+
+    def record(name, fn):
+        def action(*args):
+            order.append(name)
+            return fn(*args)
+        return action
+
+    parser.register_action('F -> id', record('F', lambda token: next(values)))
+    parser.register_action('T -> T * F', record('T*F', lambda t, _, f: t * f))
+    parser.register_action('E -> E + T', record('E+T', lambda e, _, t: e + t))
+    parser.register_action('F -> ( E )', lambda _, e, __: e)
+
+    result = parser.parse_string('id + id * id')
+    assert result['value'] == 14
+    assert order == ['F', 'F', 'F', 'T*F', 'E+T']
+
+    values = iter([2, 3, 4])
+    assert parser.parse_string('( id + id ) * id', trace=False)['value'] == 20
+
+
+@pytest.mark.parametrize('grammar, production', [
+    (EXPR_GRAMMAR, 'E -> E+T'),
+    (EXPR_GRAMMAR, 'F→(E)'),
+    ('S -> a S b | c', 'S -> aSb'),
+    ('S -> aSb | c', 'S -> a S b'),
+])
+def test_register_action_ignores_spacing(grammar, production):
+    parser = compile_grammar(grammar)
+    parser.register_action(production, lambda *args: 'matched')
+    assert len(parser.semantic_actions) == 1
+
+
+def test_register_action_rejects_unknown_production():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    with pytest.raises(ValueError):
+        parser.register_action('E -> E - T', lambda *args: None)
+
+
+def test_large_tree_without_trace():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    text = ' + '.join(['id'] * 5000)
+    result = parser.parse_string(text, build_tree=True, trace=False, max_steps=None)
+    assert result['success'] and result['steps'] == []
+    assert result['tree']['position'].count(-1) == len(result['tree']['symbol']) - 9999
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import config
+from main import app
+
+GRAMMAR = "S -> a S b | c"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(config, 'PROFILE_DIR', str(tmp_path))
+    return app.test_client()
+
+
+def test_profile_flag_honoured_without_json_content_type(client):
+    body = json.dumps({'grammar': GRAMMAR, 'profile': True})
+    response = client.post('/api/export-pdf', data=body, content_type='text/plain',
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.headers['X-Profile-Id']
+
+    response = client.post('/api/export-pdf', data=body, content_type='text/plain')
+    assert response.status_code == 403
+
+
+def test_unknown_sort_key_is_rejected(client):
+    response = client.post('/api/build-dfa', json={'grammar': GRAMMAR, 'profile': True, 'profile_sort': 'nope'},
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 400
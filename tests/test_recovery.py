@@ -0,0 +1,51 @@
+import random
+
+from services.slr_service import compile_grammar
+
+EXPR_GRAMMAR = """E -> E + T | T
+T -> T * F | F
+F -> ( E ) | id"""
+
+
+def _positions(result):
+    return [error['position'] for error in result['errors']]
+
+
+def test_one_error_per_fragment():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    result = parser.parse_string('( id id ' * 4, recover=True)
+    assert not result['success']
+    # One error per fragment, then the parentheses left open at $
+    assert _positions(result) == [2, 5, 8, 11, 12]
+    assert result['errors'][-1]['expected'] == [')', '+']
+
+
+def test_recovery_resumes_after_each_error():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    result = parser.parse_string('id + + id * * id', recover=True)
+    assert _positions(result) == [2, 5]
+    assert result['steps'][-1]['action'] == 'ACCEPT'
+
+
+def test_recovery_without_trace_or_step_cap():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    result = parser.parse_string('id + + id ' * 2000, recover=True, trace=False, max_steps=None)
+    assert result['steps'] == []
+    assert len(result['errors']) == 3999
+
+
+def test_failures_keep_collected_errors():
+    parser = compile_grammar(EXPR_GRAMMAR)
+    result = parser.parse_string('id + + id ' * 200, recover=True)
+    assert result['message'] == 'Max steps exceeded'
+    assert result['errors'] and result['errors'][0]['position'] == 2
+
+
+def test_recovery_is_the_same_with_compressed_table():
+    dense = compile_grammar(EXPR_GRAMMAR)
+    compressed = compile_grammar(EXPR_GRAMMAR)
+    compressed.compress_parsing_table()
+    rng = random.Random(0)
+    for _ in range(500):
+        text = ' '.join(rng.choice(['id', '+', '*', '(', ')']) for _ in range(rng.randint(0, 12)))
+        assert compressed.parse_string(text, recover=True) == dense.parse_string(text, recover=True), text
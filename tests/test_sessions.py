@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from handlers.slr_handler import handle_session_ws, sessions
+
+EXPR_GRAMMAR = """E -> E + T | T
+T -> T * F | F
+F -> ( E ) | id"""
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class FakeSocket:
+    """Replays messages, then raises like simple-websocket does when the client goes away."""
+
+    def __init__(self, messages):
+        self.messages = [json.dumps(m) for m in messages]
+        self.sent = []
+
+    def receive(self):
+        if not self.messages:
+            raise ConnectionClosed()
+        return self.messages.pop(0)
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def test_disconnect_deletes_only_the_owned_session():
+    other_id, _ = sessions.create(EXPR_GRAMMAR, 'id')
+    ws = FakeSocket([
+        {'op': 'create', 'grammar': EXPR_GRAMMAR, 'input_string': 'id + id'},
+        {'op': 'step', 'count': 2},
+        {'op': 'state', 'session_id': other_id},
+    ])
+    with pytest.raises(ConnectionClosed):
+        handle_session_ws(ws)
+
+    owned_id = ws.sent[0]['session_id']
+    with pytest.raises(KeyError):
+        sessions.get(owned_id)
+    assert sessions.get(other_id)
+    sessions.delete(other_id)
+
+
+def test_step_back_stops_at_start():
+    session_id, session = sessions.create(EXPR_GRAMMAR, 'id + id')
+    ws = FakeSocket([
+        {'op': 'step', 'session_id': session_id, 'count': 3},
+        {'op': 'step_back', 'session_id': session_id, 'count': 10 ** 9},
+    ])
+    with pytest.raises(ConnectionClosed):
+        handle_session_ws(ws)
+    assert len(ws.sent[1]['deltas']) == 3
+    assert session.snapshot()['step'] == 0
+    sessions.delete(session_id)
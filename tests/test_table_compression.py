@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from services.slr_service import compile_grammar
+
+GRAMMARS = [
+    "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id",
+    "S -> a S b | c",
+    "S -> A B\nA -> a A | a\nB -> b B | b",
+]
+
+
+def _parsers(grammar):
+    dense = compile_grammar(grammar)
+    compressed = compile_grammar(grammar)
+    compressed.compress_parsing_table()
+    return dense, compressed
+
+
+@pytest.mark.parametrize('grammar', GRAMMARS)
+def test_compressed_lookups_match_dense_table(grammar):
+    dense, compressed = _parsers(grammar)
+    action_columns, goto_columns = dense.table_columns()
+    for state in range(len(dense.states)):
+        for terminal in action_columns:
+            action = dense._action(state, terminal)
+            packed = compressed._action(state, terminal)
+            # Only error entries may be replaced, by the row's default reduction
+            assert packed == action or (action == 'error' and packed.startswith('r'))
+        for non_terminal in goto_columns:
+            assert compressed._goto(state, non_terminal) == dense._goto(state, non_terminal)
+
+
+@pytest.mark.parametrize('grammar', GRAMMARS)
+def test_compressed_parse_matches_dense_parse(grammar):
+    dense, compressed = _parsers(grammar)
+    terminals = sorted(dense.terminals - {'$', 'ε'}) + ['?']
+    rng = random.Random(0)
+    for _ in range(1000):
+        text = ' '.join(rng.choice(terminals) for _ in range(rng.randint(0, 10)))
+        expected = dense.parse_string(text, trace=False)
+        result = compressed.parse_string(text, trace=False)
+        assert result['success'] == expected['success'], text
+        assert result.get('errors') == expected.get('errors'), text
+
+
+def test_stats_count_every_array():
+    _, compressed = _parsers(GRAMMARS[0])
+    table = compressed.compressed_table
+    arrays = [table.action_default, table.action_base, table.action_check, table.action_next,
+              table.goto_base, table.goto_check, table.goto_next]
+    assert table.stats()['packed_cells'] == sum(len(array) for array in arrays)
@@ -1,15 +1,21 @@
 # diagram_utils.py
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import networkx as nx
-from collections import defaultdict
+from collections import defaultdict, deque
 import io
 import base64
 
-def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn):
+def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn, state_ids=None, root=0):
+    # Each call owns its Figure/canvas; nothing goes through the global pyplot
+    # state, so diagrams can be rendered from several threads at once.
+    # state_ids/root restrict the drawing to a subgraph laid out from root.
+    if state_ids is None:
+        state_ids = range(len(states))
     G = nx.DiGraph()
 
     # Nodes
-    for i in range(len(states)):
+    for i in state_ids:
         G.add_node(f'I{i}')
 
     # Edges
@@ -23,18 +29,23 @@ def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn):
         else:
             edge_labels[(from_node, to_node)] += f', {symbol}'
 
-    plt.figure(figsize=(16, 12))
+    fig = Figure(figsize=(16, 12))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
     # Layout
+    successors = defaultdict(list)
+    for (from_state, symbol), to_state in dfa_transitions.items():
+        successors[from_state].append(to_state)
     layers = defaultdict(list)
     visited = set()
-    queue = [(0, 0)]
-    visited.add(0)
+    queue = deque([(root, 0)])
+    visited.add(root)
     while queue:
-        state_idx, level = queue.pop(0)
+        state_idx, level = queue.popleft()
         layers[level].append(f'I{state_idx}')
-        for (from_state, symbol), to_state in dfa_transitions.items():
-            if from_state == state_idx and to_state not in visited:
+        for to_state in successors[state_idx]:
+            if to_state not in visited:
                 queue.append((to_state, level + 1))
                 visited.add(to_state)
 
@@ -45,10 +56,9 @@ def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn):
         for idx, node in enumerate(nodes):
             y_pos = -(idx * y_spacing)
             pos[node] = (x_pos, y_pos)
-    for i in range(len(states)):
-        node = f'I{i}'
-        if node not in pos:
-            pos[node] = (len(layers) * 3, 0)
+    unplaced = [f'I{i}' for i in state_ids if f'I{i}' not in pos]
+    for idx, node in enumerate(unplaced):
+        pos[node] = (len(layers) * 3, -(idx * 2.5))
 
     # Node colors
     node_colors = []
@@ -65,10 +75,10 @@ def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn):
             node_sizes.append(2500)
 
     nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=node_sizes,
-                           alpha=0.95, edgecolors='black', linewidths=2)
+                           alpha=0.95, edgecolors='black', linewidths=2, ax=ax)
     nx.draw_networkx_edges(G, pos, edge_color='#555555', arrows=True,
-                           arrowsize=25, width=2.5, connectionstyle='arc3,rad=0.1')
-    nx.draw_networkx_labels(G, pos, font_size=14, font_weight='bold', font_color='white')
+                           arrowsize=25, width=2.5, connectionstyle='arc3,rad=0.1', ax=ax)
+    nx.draw_networkx_labels(G, pos, font_size=14, font_weight='bold', font_color='white', ax=ax)
 
     # Edge labels
     for (u, v), label in edge_labels.items():
@@ -81,19 +91,18 @@ def generate_dfa_diagram_image(states, dfa_transitions, split_production_fn):
             offset = 0.2
             x += dy * offset / length
             y -= dx * offset / length
-        plt.text(x, y, label, fontsize=11, fontweight='bold',
-                 bbox=dict(boxstyle="round,pad=0.3", facecolor="white",
-                           edgecolor="#888888", linewidth=1.5, alpha=0.9),
-                 ha='center', va='center')
+        ax.text(x, y, label, fontsize=11, fontweight='bold',
+                bbox=dict(boxstyle="round,pad=0.3", facecolor="white",
+                          edgecolor="#888888", linewidth=1.5, alpha=0.9),
+                ha='center', va='center')
 
-    plt.title("SLR Parser DFA - Systematic Layout", fontsize=20, fontweight='bold', pad=20)
-    plt.axis('off')
-    plt.tight_layout()
+    ax.set_title("SLR Parser DFA - Systematic Layout", fontsize=20, fontweight='bold', pad=20)
+    ax.axis('off')
+    fig.tight_layout()
 
     buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
     buffer.seek(0)
     image_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
     return image_base64
 
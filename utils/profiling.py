@@ -0,0 +1,94 @@
+# profiling.py
+import cProfile
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import uuid
+from functools import wraps
+
+from flask import request, jsonify, make_response
+
+import config
+
+PROFILE_STATS_LIMIT = 40
+PROFILE_SORT_KEYS = {key.value for key in pstats.SortKey}
+
+
+def _is_admin():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(config.ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8', 'surrogateescape'),
+                                                            config.ADMIN_TOKEN.encode('utf-8'))
+
+
+def save_benchmark_fixture(endpoint, data):
+    grammar_text = data.get('grammar', '')
+    digest = hashlib.sha1(grammar_text.encode('utf-8')).hexdigest()[:12]
+    os.makedirs(config.FIXTURE_DIR, exist_ok=True)
+    file_path = os.path.join(config.FIXTURE_DIR, f"{endpoint}_{digest}.json")
+    fixture = {'endpoint': endpoint, 'grammar': grammar_text}
+    if 'input_string' in data:
+        fixture['input_string'] = data['input_string']
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=2)
+    return file_path
+
+
+def _attach_profile(response, profile_info):
+    if response.is_json:
+        raw = response.get_data()
+        if response.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+            del response.headers['Content-Encoding']
+            response.set_data(raw)
+        body = json.loads(raw)
+        if isinstance(body, dict):
+            body['profile'] = profile_info
+            response.set_data(json.dumps(body))
+            return response
+    # Non-JSON responses (PDF downloads) only get a pointer to the stored profile.
+    response.headers['X-Profile-Id'] = profile_info['id']
+    response.headers['X-Profile-Path'] = profile_info['path']
+    return response
+
+
+def profiled(handler):
+    """Run the handler under cProfile when an admin sends {"profile": true}."""
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        # force=True: some handlers accept bodies sent without a JSON content type
+        data = request.get_json(force=True, silent=True) or {}
+        if not isinstance(data, dict) or not data.get('profile'):
+            return handler(*args, **kwargs)
+        if not _is_admin():
+            return jsonify({'success': False, 'error': 'Profiling requires a valid admin token'}), 403
+        sort_key = data.get('profile_sort', 'cumulative')
+        if not isinstance(sort_key, str) or sort_key not in PROFILE_SORT_KEYS:
+            return jsonify({'success': False,
+                            'error': f"Unknown profile_sort '{sort_key}', expected one of {sorted(PROFILE_SORT_KEYS)}"}), 400
+
+        profiler = cProfile.Profile()
+        response = make_response(profiler.runcall(handler, *args, **kwargs))
+
+        profile_id = uuid.uuid4().hex
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        file_path = os.path.join(config.PROFILE_DIR, f"{handler.__name__}_{profile_id}.prof")
+        profiler.dump_stats(file_path)
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(sort_key).print_stats(PROFILE_STATS_LIMIT)
+
+        profile_info = {
+            'id': profile_id,
+            'path': file_path,
+            'total_time': stats.total_tt,
+            'stats': stream.getvalue()
+        }
+        if data.get('save_fixture'):
+            profile_info['fixture'] = save_benchmark_fixture(handler.__name__.removeprefix('handle_'), data)
+        return _attach_profile(response, profile_info)
+    return wrapper